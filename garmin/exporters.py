@@ -1,25 +1,45 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from pathlib import Path
 
 from .api import safe_api_call
-from .utils import EXPORT_ROOT, save_json
+from .utils import EXPORT_ROOT, ensure_dir, save_json, save_json_async
 
+# Upper bound on Garmin requests in flight at once (keeps us under rate limits).
+MAX_CONCURRENT_REQUESTS = 8
 
-def _exists(path: Path) -> bool:
-    """Return True if path exists (file already downloaded)."""
-    return path.exists()
+# Sub-directories of EXPORT_ROOT holding per-day files.
+DAILY_DIRS = ("activities", "sleep", "stress", "hydration", "heart_rate", "body_battery")
 
 
-def export_body_battery(api, day):
-    """Try multiple method names for body battery export.
+def _index_dir(path: Path) -> set[str]:
+    """Return the names of all entries in path (empty if it does not exist).
 
-    Skip downloading if the target file already exists.
+    A single directory read replaces one stat() per candidate file.
     """
-    target = EXPORT_ROOT / "body_battery" / f"{day}_battery.json"
-    if _exists(target):
-        print(f"✅ Skipping body battery for {day} (already exists)")
-        return
+    try:
+        with os.scandir(path) as it:
+            return {e.name for e in it}
+    except FileNotFoundError:
+        return set()
+
 
+def _is_body_battery(data) -> bool:
+    """Return True if data has the shape of a body battery response."""
+    return isinstance(data, list) and any(
+        isinstance(item, dict) and "bodyBatteryValuesArray" in item for item in data
+    )
+
+
+def _fetch_body_battery(api, day, cache: dict[str, str]):
+    """Try multiple method names for body battery; return the first data found.
+
+    The method that returned real body battery data is remembered in cache
+    (under "method") and tried first for later days. Returns None if no
+    method produced data.
+    """
     methods = [
         "get_body_battery_data",
         "get_body_battery",
@@ -27,22 +47,48 @@ def export_body_battery(api, day):
         "get_wellness",
         "get_stats",
     ]
+    cached = cache.get("method")
+    if cached is not None:
+        methods = [cached] + [m for m in methods if m != cached]
     for name in methods:
         if hasattr(api, name):
             print(f"🔍 Trying {name}() for body battery...")
             success, data, err = safe_api_call(getattr(api, name), day)
             if success and data:
-                save_json(data, target)
+                # only remember methods returning actual body battery data, never
+                # a fallback (e.g. get_stats) picked on a day with nothing synced
+                if _is_body_battery(data):
+                    cache["method"] = name
                 print(f"✅ Body battery data fetched using {name}()")
-                return
+                return data
             elif err:
                 print(f"⚠️ {name} failed: {err}")
     print("⚠️ No working body battery method found.")
+    return None
+
+
+def export_body_battery(api, day, existing: set[str] | None = None, cache: dict[str, str] | None = None):
+    """Try multiple method names for body battery export.
+
+    Skip downloading if the target file already exists. existing is an index
+    of the body_battery directory; it is read from disk if not given. Pass the same cache dict across days to reuse
+    the method that worked.
+    """
+    target = EXPORT_ROOT / "body_battery" / f"{day}_battery.json"
+    if existing is None:
+        existing = _index_dir(target.parent)
+    if target.name in existing:
+        print(f"✅ Skipping body battery for {day} (already exists)")
+        return
+    data = _fetch_body_battery(api, day, {} if cache is None else cache)
+    if data:
+        save_json(data, target)
 
 
 def export_user_profile(api):
+    existing = _index_dir(EXPORT_ROOT)
     user_path = EXPORT_ROOT / "user_profile.json"
-    if not _exists(user_path):
+    if user_path.name not in existing:
         success, data, err = safe_api_call(api.get_full_name)
         if success:
             save_json({"full_name": data}, user_path)
@@ -52,7 +98,7 @@ def export_user_profile(api):
         print("✅ Skipping user profile (already exists)")
 
     devices_path = EXPORT_ROOT / "devices.json"
-    if not _exists(devices_path):
+    if devices_path.name not in existing:
         success, device_info, err = safe_api_call(api.get_device_last_used)
         if success:
             save_json(device_info, devices_path)
@@ -62,73 +108,106 @@ def export_user_profile(api):
         print("✅ Skipping devices info (already exists)")
 
 
-def export_activity_data(api, days_back=30):
-    """Fetch daily summaries and activities for last N days.
+async def _run_blocking(pool: ThreadPoolExecutor, func, *args):
+    """Run a blocking call on pool, whose size bounds concurrent requests."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, func, *args)
+
+
+async def _export_daily(pool: ThreadPoolExecutor, api_method, day, path: Path, label: str, existing: set[str]):
+    """Fetch a single per-day dataset and save it unless listed in existing.
 
-    Skips any files that are already present on disk.
+    Only the request occupies a pool thread; the file is written afterwards
+    in the default executor so disk I/O overlaps with in-flight requests.
     """
-    for i in range(days_back):
-        d = date.today() - timedelta(days=i)
-        day = d.isoformat()
+    if path.name in existing:
+        print(f"✅ Skipping {label} {day} (already exists)")
+        return
+    success, data, err = await _run_blocking(pool, safe_api_call, api_method, day)
+    if success:
+        await save_json_async(data, path)
+    else:
+        print(f"⚠️ {label.capitalize()} {day}: {err}")
 
-        summary_path = EXPORT_ROOT / "activities" / f"{day}_summary.json"
-        if not _exists(summary_path):
-            success, summary, err = safe_api_call(api.get_user_summary, day)
-            if success:
-                save_json(summary, summary_path)
-            else:
-                print(f"⚠️ Summary {day}: {err}")
-        else:
-            print(f"✅ Skipping summary {day} (already exists)")
 
-        steps_path = EXPORT_ROOT / "activities" / f"{day}_steps.json"
-        if not _exists(steps_path):
-            success, steps, err = safe_api_call(api.get_steps_data, day)
-            if success:
-                save_json(steps, steps_path)
-        else:
-            print(f"✅ Skipping steps {day} (already exists)")
+async def _export_body_battery(pool: ThreadPoolExecutor, api, day, path: Path, existing: set[str], cache: dict[str, str]):
+    """Async counterpart of export_body_battery; the write happens off the request pool."""
+    if path.name in existing:
+        print(f"✅ Skipping body battery for {day} (already exists)")
+        return
+    data = await _run_blocking(pool, _fetch_body_battery, api, day, cache)
+    if data:
+        await save_json_async(data, path)
 
-        sleep_path = EXPORT_ROOT / "sleep" / f"{day}_sleep.json"
-        if not _exists(sleep_path):
-            success, sleep, err = safe_api_call(api.get_sleep_data, day)
-            if success:
-                save_json(sleep, sleep_path)
-        else:
-            print(f"✅ Skipping sleep {day} (already exists)")
 
-        stress_path = EXPORT_ROOT / "stress" / f"{day}_stress.json"
-        if not _exists(stress_path):
-            success, stress, err = safe_api_call(api.get_stress_data, day)
-            if success:
-                save_json(stress, stress_path)
-        else:
-            print(f"✅ Skipping stress {day} (already exists)")
+async def _fetch_day(
+    api, day, pool: ThreadPoolExecutor, dirs: dict[str, Path], index: dict[str, set[str]], bb_cache: dict[str, str]
+):
+    """Fetch all per-day datasets for a single day concurrently."""
 
+    def daily(api_method, sub, filename, label):
+        return _export_daily(pool, api_method, day, dirs[sub] / filename, label, index[sub])
+
+    tasks = {
+        "summary": daily(api.get_user_summary, "activities", f"{day}_summary.json", "summary"),
+        "steps": daily(api.get_steps_data, "activities", f"{day}_steps.json", "steps"),
+        "sleep": daily(api.get_sleep_data, "sleep", f"{day}_sleep.json", "sleep"),
+        "stress": daily(api.get_stress_data, "stress", f"{day}_stress.json", "stress"),
         # Updated adaptive body battery handling
-        export_body_battery(api, day)
+        "body battery": _export_body_battery(
+            pool, api, day, dirs["body_battery"] / f"{day}_battery.json", index["body_battery"], bb_cache
+        ),
+        "hydration": daily(api.get_hydration_data, "hydration", f"{day}_hydration.json", "hydration"),
+        "heart rate": daily(api.get_heart_rates, "heart_rate", f"{day}_hr.json", "heart rate"),
+    }
+    # one failing dataset (request or write) must not orphan the day's other tasks
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    for label, result in zip(tasks, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ {label.capitalize()} {day} failed: {result}")
+
+
+async def export_activity_data_async(api, days_back=30, max_concurrency=MAX_CONCURRENT_REQUESTS):
+    """Fetch daily summaries and activities for last N days concurrently.
+
+    garminconnect is synchronous, so every request runs on a dedicated
+    thread pool of max_concurrency workers, which is the hard bound on
+    requests in flight. Skips any files that are already present on disk.
+    """
+    # resolve and create each target directory once rather than per file
+    dirs = {sub: EXPORT_ROOT / sub for sub in DAILY_DIRS}
+    for d in dirs.values():
+        ensure_dir(d)
+    # list each directory once up front instead of stat-ing every target file
+    index = {sub: _index_dir(d) for sub, d in dirs.items()}
+    today = date.today()
+    days = [(today - timedelta(days=i)).isoformat() for i in range(days_back)]
+    # body battery method that worked during this run
+    bb_cache: dict[str, str] = {}
+    pool = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        results = await asyncio.gather(
+            *[_fetch_day(api, day, pool, dirs, index, bb_cache) for day in days], return_exceptions=True
+        )
+    finally:
+        # every task has finished (or been cancelled) here; don't block the loop joining threads
+        pool.shutdown(wait=False, cancel_futures=True)
+    for day, result in zip(days, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ Export {day} failed: {result}")
 
-        hydration_path = EXPORT_ROOT / "hydration" / f"{day}_hydration.json"
-        if not _exists(hydration_path):
-            success, hydration, err = safe_api_call(api.get_hydration_data, day)
-            if success:
-                save_json(hydration, hydration_path)
-        else:
-            print(f"✅ Skipping hydration {day} (already exists)")
 
-        hr_path = EXPORT_ROOT / "heart_rate" / f"{day}_hr.json"
-        if not _exists(hr_path):
-            success, hr_data, err = safe_api_call(api.get_heart_rates, day)
-            if success:
-                save_json(hr_data, hr_path)
-        else:
-            print(f"✅ Skipping heart rate {day} (already exists)")
+def export_activity_data(api, days_back=30):
+    """Synchronous wrapper around export_activity_data_async."""
+    asyncio.run(export_activity_data_async(api, days_back=days_back))
 
 
 def export_body_data(api):
     """Export long-term measurements like weight, stress, etc."""
+    existing = _index_dir(EXPORT_ROOT / "body")
+    today = date.today().isoformat()
     body_comp_path = EXPORT_ROOT / "body" / "body_composition.json"
-    if not _exists(body_comp_path):
+    if body_comp_path.name not in existing:
         success, weight, err = safe_api_call(api.get_body_composition)
         if success:
             save_json(weight, body_comp_path)
@@ -136,8 +215,8 @@ def export_body_data(api):
         print("✅ Skipping body composition (already exists)")
 
     stress_today_path = EXPORT_ROOT / "body" / "stress_today.json"
-    if not _exists(stress_today_path):
-        success, stress, err = safe_api_call(api.get_stress_data, date.today().isoformat())
+    if stress_today_path.name not in existing:
+        success, stress, err = safe_api_call(api.get_stress_data, today)
         if success:
             save_json(stress, stress_today_path)
     else:
@@ -145,8 +224,8 @@ def export_body_data(api):
 
     hrv_path = EXPORT_ROOT / "body" / "hrv_today.json"
     if hasattr(api, "get_hrv_data"):
-        if not _exists(hrv_path):
-            success, hrv, err = safe_api_call(api.get_hrv_data, date.today().isoformat())
+        if hrv_path.name not in existing:
+            success, hrv, err = safe_api_call(api.get_hrv_data, today)
             if success:
                 save_json(hrv, hrv_path)
         else:
@@ -158,7 +237,7 @@ def export_body_data(api):
 def export_activities_list(api):
     """Fetch all recorded activities metadata."""
     target = EXPORT_ROOT / "activities" / "activities_list.json"
-    if _exists(target):
+    if target.name in _index_dir(target.parent):
         print("✅ Skipping activities_list (already exists)")
         return
 
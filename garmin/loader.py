@@ -1,9 +1,25 @@
 import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from dateutil import tz
+import numpy as np
 import pandas as pd
 from typing import Tuple, Optional
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
+
+# below this many days a process pool costs more (startup + pickling frames) than it saves
+PARALLEL_MIN_DAYS = 8
+
+# whole-line // comments that some exported files carry at the top
+_COMMENT_RE = re.compile(rb"(?m)^[ \t]*//[^\n]*")
+
 
 def _infer_tz_from_summary(summary: dict):
     # prefer wellnessStartTimeLocal / wellnessStartTimeGmt pair if available
@@ -29,115 +45,106 @@ def _infer_tz_from_summary(summary: dict):
 
 
 def _read_json(p: Path):
-    with p.open("r", encoding="utf-8") as f:
-        txt = f.read()
-    # some files include // comments at top; remove //... lines
-    lines = [l for l in txt.splitlines() if not l.strip().startswith("//")]
-    return json.loads("\n".join(lines))
-
-
-def _parse_steps(path: Path, local_tz, freq="1min") -> pd.Series:
-    if not path.exists():
-        return pd.Series(dtype=float)
+    # returns None if the file does not exist (one open instead of stat + open)
+    try:
+        data = p.read_bytes()
+    except FileNotFoundError:
+        return None
+    # some files include // comments at top; blank out //... lines (only scan if any)
+    if b"//" in data:
+        data = _COMMENT_RE.sub(b"", data)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _expand_buckets(starts: pd.DatetimeIndex, mins: np.ndarray, values: np.ndarray, freq="1min") -> pd.Series:
+    # spread each bucket's value over `mins` consecutive freq steps from its start;
+    # builds the whole index with NumPy arithmetic instead of a date_range per bucket
+    base = np.repeat(starts.as_unit("ns").asi8, mins)
+    # position of every row within its own bucket: 0, 1, ..., mins[i] - 1
+    pos = np.arange(mins.sum()) - np.repeat(np.cumsum(mins) - mins, mins)
+    idx = pd.to_datetime(base + pos * pd.Timedelta(freq).value, unit="ns", utc=True).tz_convert(starts.tz)
+    return pd.Series(np.repeat(values, mins), index=idx).sort_index()
+
+
+def _parse_steps(path: Path, local_tz, freq="1min") -> Tuple[pd.Series, pd.Series]:
+    # returns (steps_per_min_series, activity_level_series) from a single read
     arr = _read_json(path)
-    parts = []
-    for item in arr:
-        start = pd.to_datetime(item["startGMT"]) if isinstance(item["startGMT"], str) else pd.to_datetime(item.get("startGMT"))
-        end = pd.to_datetime(item["endGMT"]) if isinstance(item["endGMT"], str) else pd.to_datetime(item.get("endGMT"))
-        # convert to aware UTC then to local
-        start_utc = start.tz_localize("UTC") if start.tzinfo is None else start.tz_convert("UTC")
-        end_utc = end.tz_localize("UTC") if end.tzinfo is None else end.tz_convert("UTC")
-        start_local = start_utc.tz_convert(local_tz)
-        end_local = end_utc.tz_convert(local_tz)
-        steps = item.get("steps", 0) or 0
-        # number of whole minutes in interval
-        minutes = int((end_local - start_local).total_seconds() / 60)
-        if minutes <= 0:
-            continue
-        per_min = steps / minutes
-        idx = pd.date_range(start_local, periods=minutes, freq=freq, tz=local_tz)
-        s = pd.Series(per_min, index=idx)
-        parts.append(s)
-    if not parts:
-        return pd.Series(dtype=float)
-    res = pd.concat(parts).sort_index()
-    # ensure Series (concat can return DataFrame if shapes differ)
-    if isinstance(res, pd.DataFrame):
-        res = res.squeeze()
-    return res
+    if not arr:
+        return pd.Series(dtype=float), pd.Series(dtype=object)
+    # convert all bucket bounds to aware UTC then to local in one vectorized call each
+    starts = pd.to_datetime([item["startGMT"] for item in arr], utc=True).tz_convert(local_tz)
+    ends = pd.to_datetime([item["endGMT"] for item in arr], utc=True).tz_convert(local_tz)
+    # number of whole minutes in each interval; empty or inverted buckets are dropped
+    mins = ((ends - starts) // pd.Timedelta(minutes=1)).to_numpy(dtype="int64")
+    keep = mins > 0
+    if not keep.any():
+        return pd.Series(dtype=float), pd.Series(dtype=object)
+    steps = np.asarray([item.get("steps", 0) or 0 for item in arr], dtype="float64")
+    levels = np.asarray([item.get("primaryActivityLevel") for item in arr], dtype=object)
+    starts, mins = starts[keep], mins[keep]
+    res = _expand_buckets(starts, mins, steps[keep] / mins, freq)
+    activity = _expand_buckets(starts, mins, levels[keep], freq)
+    return res, activity
 
 
 def _parse_point_series(path: Path, array_key: str, local_tz, freq="1min") -> Tuple[pd.Series, pd.Series]:
     # returns (resampled_mean_series, presence_mask_series_before_interp)
-    if not path.exists():
-        return pd.Series(dtype=float), pd.Series(dtype=bool)
     data = _read_json(path)
+    if data is None:
+        return pd.Series(dtype=float), pd.Series(dtype=bool)
     values = data.get(array_key) or data.get("heartRateValues") or data.get("stressValuesArray") or data
     if not isinstance(values, list):
         return pd.Series(dtype=float), pd.Series(dtype=bool)
-    times = []
-    vals = []
-    for v in values:
-        if not v:
-            continue
-        ts = int(v[0])
-        value = v[1]
-        t = pd.to_datetime(ts, unit="ms", utc=True).tz_convert(local_tz)
-        times.append(t)
-        vals.append(value)
-    if not times:
+    # keep only [timestamp, value]; some samples carry extra trailing fields
+    values = [v[:2] for v in values if v]
+    if not values:
         return pd.Series(dtype=float), pd.Series(dtype=bool)
-    sr = pd.Series(vals, index=pd.DatetimeIndex(times))
-    # group into minute bins (mean)
-    res = sr.resample(freq).mean()
-    presence = (sr.resample(freq).count() > 0).astype("boolean")
+    # let pandas split the [timestamp, value] pairs into columns in C
+    frame = pd.DataFrame(values, columns=["ts", "val"]).dropna(subset=["ts"])
+    # convert all timestamps in one vectorized call instead of per sample
+    idx = pd.to_datetime(frame["ts"].to_numpy(dtype="int64"), unit="ms", utc=True).tz_convert(local_tz)
+    sr = pd.Series(frame["val"].to_numpy(dtype="float64"), index=idx)
+    # group into minute bins (mean and sample count in a single resample pass)
+    agg = sr.resample(freq).agg(["mean", "count"])
+    res = agg["mean"]
+    presence = (agg["count"] > 0).astype("boolean")
     return res, presence
 
 
 def _parse_sleep(path: Path, local_tz, freq="1min") -> pd.Series:
-    if not path.exists():
-        return pd.Series(dtype=float)
     data = _read_json(path)
-    parts = []
+    if data is None:
+        return pd.Series(dtype=float)
     # sleepMovement is an array of minute buckets
     sm = data.get("sleepMovement") or []
-    for item in sm:
-        start = pd.to_datetime(item.get("startGMT"))
-        start_utc = start.tz_localize("UTC") if start.tzinfo is None else start.tz_convert("UTC")
-        start_local = start_utc.tz_convert(local_tz)
-        minutes = int((pd.to_datetime(item.get("endGMT")).tz_localize("UTC").tz_convert(local_tz) - start_local).total_seconds() / 60)
-        if minutes <= 0:
-            continue
-        idx = pd.date_range(start_local, periods=minutes, freq=freq, tz=local_tz)
-        s = pd.Series(item.get("activityLevel"), index=idx)
-        parts.append(s)
-    if not parts:
+    if not sm:
         return pd.Series(dtype=float)
-    res = pd.concat(parts).sort_index()
-    if isinstance(res, pd.DataFrame):
-        res = res.squeeze()
-    return res
+    starts = pd.to_datetime([item.get("startGMT") for item in sm], utc=True).tz_convert(local_tz)
+    ends = pd.to_datetime([item.get("endGMT") for item in sm], utc=True).tz_convert(local_tz)
+    mins = ((ends - starts) // pd.Timedelta(minutes=1)).to_numpy(dtype="int64")
+    keep = mins > 0
+    if not keep.any():
+        return pd.Series(dtype=float)
+    levels = np.asarray([item.get("activityLevel") for item in sm], dtype="float64")
+    return _expand_buckets(starts[keep], mins[keep], levels[keep], freq)
 
 
 def _parse_body_battery(path: Path, local_tz, freq="1min") -> Tuple[pd.Series, pd.Series]:
-    if not path.exists():
-        return pd.Series(dtype=float), pd.Series(dtype="boolean")
     arr = _read_json(path)
+    if arr is None:
+        return pd.Series(dtype=float), pd.Series(dtype="boolean")
     if isinstance(arr, list) and len(arr) > 0 and isinstance(arr[0], dict):
         arr = arr[0].get("bodyBatteryValuesArray") or []
     if not isinstance(arr, list):
         return pd.Series(dtype=float), pd.Series(dtype="boolean")
-    times = []
-    vals = []
-    for v in arr:
-        ts = int(v[0])
-        val = v[1]
-        t = pd.to_datetime(ts, unit="ms", utc=True).tz_convert(local_tz)
-        times.append(t)
-        vals.append(val)
-    if not times:
+    if not arr:
         return pd.Series(dtype=float), pd.Series(dtype="boolean")
-    sr = pd.Series(vals, index=pd.DatetimeIndex(times))
+    ts_arr = np.asarray([v[0] for v in arr], dtype="int64")
+    val_arr = np.asarray([v[1] for v in arr], dtype="float64")
+    idx = pd.DatetimeIndex(pd.to_datetime(ts_arr, unit="ms", utc=True)).tz_convert(local_tz)
+    sr = pd.Series(val_arr, index=idx)
     # upsample to minute index via nearest forward-fill
     res = sr.resample(freq).nearest(limit=1)
     # ensure numeric dtype to avoid object-dtype downcasting warnings on ffill
@@ -148,7 +155,120 @@ def _parse_body_battery(path: Path, local_tz, freq="1min") -> Tuple[pd.Series, p
     return res, presence
 
 
-def structure_data(export_path: str = "garmin_export", freq: str = "1min", interpolate_gaps: bool = True, max_interp_minutes: int = 5, last_n_days: Optional[int] = 3):
+def _process_day(sf: Path, root: Path, freq: str, interpolate_gaps: bool, max_interp_minutes: int) -> Optional[Tuple[pd.DataFrame, dict]]:
+    """Build the per-minute frame and daily summary row for one summary file.
+
+    Returns None if the summary cannot be read or has no calendar date.
+    Runs in a worker process, so it only takes picklable arguments.
+    """
+    try:
+        summary = _read_json(sf)
+    except Exception:
+        return None
+    if summary is None:
+        return None
+    calendar_date = summary.get("calendarDate") or summary.get("date")
+    if not calendar_date:
+        return None
+    local_tz = _infer_tz_from_summary(summary)
+    # Determine day's window
+    try:
+        start_gmt = summary.get("wellnessStartTimeGmt") or summary.get("startTimestampGMT")
+        end_gmt = summary.get("wellnessEndTimeGmt") or summary.get("endTimestampGMT")
+        if start_gmt and end_gmt:
+            start = pd.to_datetime(start_gmt).tz_localize("UTC").tz_convert(local_tz)
+            end = pd.to_datetime(end_gmt).tz_localize("UTC").tz_convert(local_tz)
+        else:
+            # full local day
+            start = pd.to_datetime(calendar_date + "T00:00:00").tz_localize(local_tz)
+            end = start + pd.Timedelta(days=1)
+    except Exception:
+        start = pd.to_datetime(calendar_date + "T00:00:00").tz_localize(local_tz)
+        end = start + pd.Timedelta(days=1)
+
+    # make end exclusive by subtracting one minute
+    minute_index = pd.date_range(start, end - pd.Timedelta(minutes=1), freq=freq, tz=local_tz)
+
+    # parse source files
+    steps_path = root / "activities" / f"{calendar_date}_steps.json"
+    hr_path = root / "heart_rate" / f"{calendar_date}_hr.json"
+    stress_path = root / "stress" / f"{calendar_date}_stress.json"
+    sleep_path = root / "sleep" / f"{calendar_date}_sleep.json"
+    body_batt_path = root / "body_battery" / f"{calendar_date}_battery.json"
+
+    steps_series, activity_series = _parse_steps(steps_path, local_tz, freq)
+    hr_series, hr_presence = _parse_point_series(hr_path, "heartRateValues", local_tz, freq)
+    stress_series, stress_presence = _parse_point_series(stress_path, "stressValuesArray", local_tz, freq)
+    sleep_series = _parse_sleep(sleep_path, local_tz, freq)
+    try:
+        body_series, body_presence = _parse_body_battery(body_batt_path, local_tz, freq)
+    except Exception:
+        body_series = pd.Series(dtype=float)
+        body_presence = pd.Series(dtype=bool)
+
+    # reindex to minute_index (parsers already return float64, so no astype copy)
+    df = pd.DataFrame(index=minute_index)
+    df["steps_per_min"] = steps_series.reindex(minute_index)
+    df["heart_rate"] = hr_series.reindex(minute_index)
+    df["stress_level"] = stress_series.reindex(minute_index)
+    df["sleep_movement"] = sleep_series.reindex(minute_index)
+    df["body_battery"] = body_series.reindex(minute_index)
+
+    # presence masks
+    df["steps_present"] = ~df["steps_per_min"].isna()
+    # reindex presence series using fill_value=False to avoid creating object-dtype NaNs
+    hrp_reindexed = hr_presence.reindex(minute_index, fill_value=False)
+    df["heart_rate_present"] = pd.Series(hrp_reindexed.astype("boolean"), index=minute_index)
+
+    sp_reindexed = stress_presence.reindex(minute_index, fill_value=False)
+    df["stress_present"] = pd.Series(sp_reindexed.astype("boolean"), index=minute_index)
+
+    df["sleep_present"] = ~df["sleep_movement"].isna()
+    try:
+        bp_reindexed = body_presence.reindex(minute_index, fill_value=False)
+        df["body_battery_present"] = pd.Series(bp_reindexed.astype("boolean"), index=minute_index)
+    except Exception:
+        df["body_battery_present"] = ~df["body_battery"].isna()
+
+    # activity level from steps file (categorical)
+    df["activity_level"] = activity_series.reindex(minute_index)
+
+    # interpolation for HR and stress (limit gaps)
+    if interpolate_gaps:
+        for col in ("heart_rate", "stress_level"):
+            na = df[col].isna()
+            # skip when there is nothing to fill (no gaps) or nothing to fill from (no data)
+            if na.any() and not na.all():
+                df[col] = df[col].interpolate(method="time", limit=max_interp_minutes)
+
+    # calendarDate column (string)
+    df["calendarDate"] = calendar_date
+
+    # attach selected daily summary fields (minimal metadata)
+    daily_meta = {k: summary.get(k) for k in [
+        "totalSteps",
+        "totalKilocalories",
+        "activeKilocalories",
+        "totalDistanceMeters",
+        "restingHeartRate",
+        "restingHeartRate",
+        "minHeartRate",
+        "maxHeartRate",
+        "averageStressLevel",
+        "bodyBatteryAtWakeTime",
+        "bodyBatteryMostRecentValue",
+        "sleepingSeconds",
+        "deepSleepSeconds",
+        "lightSleepSeconds",
+        "remSleepSeconds",
+        "sleepScore"
+    ] if summary.get(k) is not None}
+    daily_meta["calendarDate"] = calendar_date
+
+    return df, daily_meta
+
+
+def structure_data(export_path: str = "garmin_export", freq: str = "1min", interpolate_gaps: bool = True, max_interp_minutes: int = 5, last_n_days: Optional[int] = 3, max_workers: Optional[int] = None):
     """Load recent garmin_export and build a combined per-minute multivariate time-series across all days.
 
     Returns (df_all_days, daily_summary_df)
@@ -161,6 +281,8 @@ def structure_data(export_path: str = "garmin_export", freq: str = "1min", inter
     - interpolate_gaps: whether to interpolate gaps in heart rate and stress data (default: True)
     - max_interp_minutes: maximum gap size in minutes to interpolate (default: 5)
     - last_n_days: number of most recent days to include (default: 3). If None, include all days.
+    - max_workers: number of worker processes used to parse days in parallel (default: CPU count).
+      Days are parsed in-process when this is 1 or fewer than PARALLEL_MIN_DAYS days are loaded.
     """
     root = Path(export_path)
     activities_dir = root / "activities"
@@ -175,132 +297,29 @@ def structure_data(export_path: str = "garmin_export", freq: str = "1min", inter
     day_frames = []
     daily_rows = []
 
-    # run processing
-    for sf in summary_files:
-        try:
-            summary = _read_json(sf)
-        except Exception:
+    args = (summary_files, repeat(root), repeat(freq), repeat(interpolate_gaps), repeat(max_interp_minutes))
+    workers = max_workers or os.process_cpu_count() or 1
+    if workers <= 1 or len(summary_files) < PARALLEL_MIN_DAYS:
+        results = list(map(_process_day, *args))
+    else:
+        # days are independent, so fan the (CPU-bound) pandas work out across cores
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_process_day, *args, chunksize=2))
+
+    for result in results:
+        if result is None:
             continue
-        calendar_date = summary.get("calendarDate") or summary.get("date")
-        if not calendar_date:
-            continue
-        local_tz = _infer_tz_from_summary(summary)
-        # Determine day's window
-        try:
-            start_gmt = summary.get("wellnessStartTimeGmt") or summary.get("startTimestampGMT")
-            end_gmt = summary.get("wellnessEndTimeGmt") or summary.get("endTimestampGMT")
-            if start_gmt and end_gmt:
-                start = pd.to_datetime(start_gmt).tz_localize("UTC").tz_convert(local_tz)
-                end = pd.to_datetime(end_gmt).tz_localize("UTC").tz_convert(local_tz)
-            else:
-                # full local day
-                start = pd.to_datetime(calendar_date + "T00:00:00").tz_localize(local_tz)
-                end = start + pd.Timedelta(days=1)
-        except Exception:
-            start = pd.to_datetime(calendar_date + "T00:00:00").tz_localize(local_tz)
-            end = start + pd.Timedelta(days=1)
-
-        # make end exclusive by subtracting one minute
-        minute_index = pd.date_range(start, end - pd.Timedelta(minutes=1), freq=freq, tz=local_tz)
-
-        # parse source files
-        base = activities_dir
-        steps_path = base / f"{calendar_date}_steps.json"
-        hr_path = root / "heart_rate" / f"{calendar_date}_hr.json"
-        stress_path = root / "stress" / f"{calendar_date}_stress.json"
-        sleep_path = root / "sleep" / f"{calendar_date}_sleep.json"
-        body_batt_path = root / "body_battery" / f"{calendar_date}_battery.json"
-
-        steps_series = _parse_steps(steps_path, local_tz, freq)
-        hr_series, hr_presence = _parse_point_series(hr_path, "heartRateValues", local_tz, freq)
-        stress_series, stress_presence = _parse_point_series(stress_path, "stressValuesArray", local_tz, freq)
-        sleep_series = _parse_sleep(sleep_path, local_tz, freq)
-        try:
-            body_series, body_presence = _parse_body_battery(body_batt_path, local_tz, freq)
-        except Exception:
-            body_series = pd.Series(dtype=float)
-            body_presence = pd.Series(dtype=bool)
-
-        # reindex to minute_index
-        df = pd.DataFrame(index=minute_index)
-        df["steps_per_min"] = steps_series.reindex(minute_index).astype(float)
-        df["heart_rate"] = hr_series.reindex(minute_index).astype(float)
-        df["stress_level"] = stress_series.reindex(minute_index).astype(float)
-        df["sleep_movement"] = sleep_series.reindex(minute_index).astype(float)
-        df["body_battery"] = body_series.reindex(minute_index).astype(float)
-
-        # presence masks
-        df["steps_present"] = ~df["steps_per_min"].isna()
-        # reindex presence series using fill_value=False to avoid creating object-dtype NaNs
-        hrp_reindexed = hr_presence.reindex(minute_index, fill_value=False)
-        df["heart_rate_present"] = pd.Series(hrp_reindexed.astype("boolean"), index=minute_index)
-
-        sp_reindexed = stress_presence.reindex(minute_index, fill_value=False)
-        df["stress_present"] = pd.Series(sp_reindexed.astype("boolean"), index=minute_index)
-
-        df["sleep_present"] = ~df["sleep_movement"].isna()
-        try:
-            bp_reindexed = body_presence.reindex(minute_index, fill_value=False)
-            df["body_battery_present"] = pd.Series(bp_reindexed.astype("boolean"), index=minute_index)
-        except Exception:
-            df["body_battery_present"] = ~df["body_battery"].isna()
-
-        # activity level from steps file (categorical)
-        # read raw steps file again to get activity labels per bucket
-        activity_levels = []
-        if steps_path.exists():
-            arr = _read_json(steps_path)
-            for item in arr:
-                start = pd.to_datetime(item["startGMT"]).tz_localize("UTC").tz_convert(local_tz)
-                end = pd.to_datetime(item["endGMT"]).tz_localize("UTC").tz_convert(local_tz)
-                minutes = int((end - start).total_seconds() / 60)
-                if minutes <= 0:
-                    continue
-                idx = pd.date_range(start, periods=minutes, freq=freq, tz=local_tz)
-                s = pd.Series(item.get("primaryActivityLevel"), index=idx)
-                activity_levels.append(s)
-        if activity_levels:
-            activity = pd.concat(activity_levels).reindex(minute_index)
-        else:
-            activity = pd.Series(index=minute_index, dtype=object)
-        df["activity_level"] = activity
-
-        # interpolation for HR and stress (limit gaps)
-        if interpolate_gaps:
-            df["heart_rate"] = df["heart_rate"].interpolate(method="time", limit=max_interp_minutes)
-            df["stress_level"] = df["stress_level"].interpolate(method="time", limit=max_interp_minutes)
-
-        # calendarDate column (string)
-        df["calendarDate"] = calendar_date
-
-        # attach selected daily summary fields (minimal metadata)
-        daily_meta = {k: summary.get(k) for k in [
-            "totalSteps",
-            "totalKilocalories",
-            "activeKilocalories",
-            "totalDistanceMeters",
-            "restingHeartRate",
-            "restingHeartRate",
-            "minHeartRate",
-            "maxHeartRate",
-            "averageStressLevel",
-            "bodyBatteryAtWakeTime",
-            "bodyBatteryMostRecentValue",
-            "sleepingSeconds",
-            "deepSleepSeconds",
-            "lightSleepSeconds",
-            "remSleepSeconds",
-            "sleepScore"
-        ] if summary.get(k) is not None}
-        daily_meta["calendarDate"] = calendar_date
-        daily_rows.append(daily_meta)
-
+        df, daily_meta = result
         day_frames.append(df)
+        daily_rows.append(daily_meta)
 
     if not day_frames:
         return pd.DataFrame(), pd.DataFrame()
 
-    df_all = pd.concat(day_frames).sort_index()
+    df_all = pd.concat(day_frames)
+    # days arrive in date order and rarely overlap; only pay for a sort if needed
+    if not df_all.index.is_monotonic_increasing:
+        df_all = df_all.sort_index()
 
     daily_summary_df = pd.DataFrame(daily_rows).drop_duplicates(subset=["calendarDate"]).set_index("calendarDate")
 
@@ -1,17 +1,42 @@
+import asyncio
 import json
 import logging
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
 logging.getLogger("garminconnect").setLevel(logging.CRITICAL)
 
 EXPORT_ROOT = Path("garmin_export").resolve()
 EXPORT_ROOT.mkdir(exist_ok=True)
 
+# directories already created during this run (skips repeated mkdir syscalls)
+_ENSURED_DIRS: set[Path] = {EXPORT_ROOT}
+
+
+def ensure_dir(path: Path):
+    """Create directory path (and parents) once per process."""
+    if path not in _ENSURED_DIRS:
+        path.mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
 
 def save_json(data, path: Path):
     """Save data to JSON file (UTF-8, pretty)."""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    ensure_dir(path.parent)
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
     print(f"💾 Saved {path.relative_to(EXPORT_ROOT)}")
 
+
+async def save_json_async(data, path: Path):
+    """Save data like save_json, serializing and writing in the default executor."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, save_json, data, path)
+
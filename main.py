@@ -1,7 +1,9 @@
+import asyncio
+
 from garmin.api import init_api
 from garmin.exporters import (
     export_user_profile,
-    export_activity_data,
+    export_activity_data_async,
     export_body_data,
     export_activities_list,
 )
@@ -9,9 +11,23 @@ from garmin.loader import structure_data
 from garmin.utils import EXPORT_ROOT
 import sys
 
+import pandas as pd
+
 # Number of days to export (default 30). Update this constant to change the range.
 DEFAULT_DAYS_BACK = 31
 
+# Format of the structured output: "csv" (default) or "parquet" (needs the "fast" extra).
+OUTPUT_FORMAT = "csv"
+
+
+def save_parquet(df_all, daily_summary_df):
+    """Save structured data to Parquet, keeping timestamps and dates as columns."""
+    # days can differ in UTC offset (object-dtype index), so store timestamps in UTC
+    timestamps = pd.to_datetime(df_all.index, utc=True)
+    df_all = df_all.set_axis(timestamps).rename_axis("timestamp").reset_index()
+    df_all.to_parquet("df_all.parquet", index=False, compression="zstd")
+    daily_summary_df.reset_index().to_parquet("daily_summary.parquet", index=False, compression="zstd")
+
 
 def main():
     print("🏃‍♂️ Garmin Full Data Export")
@@ -23,7 +39,7 @@ def main():
         sys.exit(1)
 
     export_user_profile(api)
-    export_activity_data(api, days_back=DEFAULT_DAYS_BACK)
+    asyncio.run(export_activity_data_async(api, days_back=DEFAULT_DAYS_BACK))
     export_body_data(api)
     export_activities_list(api)
 
@@ -31,9 +47,12 @@ def main():
     print(f"📁 Data saved in: {EXPORT_ROOT}")
 
     df_all, daily_summary_df = structure_data(last_n_days=DEFAULT_DAYS_BACK)
-    # save structured data to CSV
-    df_all.to_csv("df_all.csv", index=False)
-    daily_summary_df.to_csv("daily_summary.csv", index=False)
+    if OUTPUT_FORMAT == "parquet":
+        save_parquet(df_all, daily_summary_df)
+    else:
+        # save structured data to CSV
+        df_all.to_csv("df_all.csv", index=False)
+        daily_summary_df.to_csv("daily_summary.csv", index=False)
 
 if __name__ == "__main__":
     try: